@@ -1,9 +1,14 @@
 import streamlit as st
 import requests
+import orjson
 import re
-import json
-from urllib.parse import urlparse
-import base64
+import html
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Page configuration
 st.set_page_config(
@@ -14,7 +19,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
+CSS = """
 <style>
     .main-header {
         background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
@@ -49,92 +54,303 @@ st.markdown("""
         margin: 0.5rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(CSS, unsafe_allow_html=True)
+
+@st.cache_resource
+def get_session():
+    """Create a pooled HTTP session shared across reruns"""
+    session = requests.Session()
+    session.headers.update({
+        "Accept": "application/vnd.github+json",
+        "User-Agent": "repo-guide"
+    })
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries))
+    return session
+
+SESSION = get_session()
+
+class ETagCache:
+    """Small LRU store of (etag, status, content) for GitHub GET requests"""
+    
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry:
+                self.entries.move_to_end(key)
+            return entry
+    
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+@st.cache_resource
+def get_etag_cache():
+    """ETag store shared across reruns and sessions"""
+    return ETagCache()
+
+def github_get(url, etag_cache, headers=None, max_bytes=None):
+    """GET a GitHub API URL as (status, content), revalidating by ETag"""
+    key = (url, tuple(sorted((headers or {}).items())))
+    request_headers = dict(headers or {})
+    cached = etag_cache.get(key)
+    if cached:
+        # A 304 reply has no body; requests here are unauthenticated, so it still
+        # counts against the rate limit but skips re-downloading the payload
+        request_headers['If-None-Match'] = cached[0]
+    
+    if max_bytes is None:
+        response = SESSION.get(url, headers=request_headers, timeout=10)
+        content = response.content
+    else:
+        # Stream so the cap holds even if the server ignores a Range header;
+        # iter_content wraps urllib3 read errors as requests exceptions
+        with SESSION.get(url, headers=request_headers, timeout=10, stream=True) as response:
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=max_bytes):
+                body += chunk
+                if len(body) >= max_bytes:
+                    break
+            content = bytes(body[:max_bytes])
+    
+    if response.status_code == 304 and cached:
+        return cached[1], cached[2]
+    if response.status_code in (200, 206) and response.headers.get('ETag'):
+        etag_cache.put(key, (response.headers['ETag'], response.status_code, content))
+    return response.status_code, content
+
+# Owner and repo name, ignoring a trailing .git, slash, path, query or fragment
+REPO_URL_RE = re.compile(r'github\.com/([^/?#]+)/([^/?#]+?)(?:\.git)?(?:[/?#]|$)')
 
 def extract_repo_info(github_url):
     """Extract owner and repo name from GitHub URL"""
-    pattern = r'github\.com/([^/]+)/([^/]+)'
-    match = re.search(pattern, github_url)
+    match = REPO_URL_RE.search(github_url)
     if match:
-        return match.group(1), match.group(2).replace('.git', '')
+        return match.group(1), match.group(2)
     return None, None
 
+REPO_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    isPrivate
+    stargazerCount
+    forkCount
+    diskUsage
+    description
+    homepageUrl
+    primaryLanguage { name }
+    object(expression: "HEAD:") {
+      ... on Tree { entries { name type } }
+    }
+    readme: object(expression: "HEAD:README.md") {
+      ... on Blob { text }
+    }
+  }
+}
+"""
+
+def get_github_token():
+    """Get an optional GitHub token from the environment"""
+    # Streamlit copies top-level secrets into os.environ, and touching st.secrets
+    # without a secrets.toml draws an error box on older Streamlit versions
+    return os.environ.get("GITHUB_TOKEN")
+
+class RepoDataError(Exception):
+    """Raised from cached fetches so failed lookups are not cached"""
+
 def get_repo_data(owner, repo):
     """Fetch repository data from GitHub API"""
     try:
-        # Repository basic info
-        repo_url = f"https://api.github.com/repos/{owner}/{repo}"
-        repo_response = requests.get(repo_url, timeout=10)
+        return fetch_repo_data(owner, repo), None
+    except RepoDataError as e:
+        return None, str(e)
+
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_repo_data(owner, repo):
+    """Fetch and cache repository data, raising RepoDataError on failure"""
+    token = get_github_token()
+    if token:
+        data, error = get_repo_data_graphql(owner, repo, token)
+    else:
+        data, error = get_repo_data_rest(owner, repo)
+    if error:
+        raise RepoDataError(error)
+    return data
+
+def get_repo_data_graphql(owner, repo, token):
+    """Fetch repository info, root contents and README in a single GraphQL query"""
+    try:
+        response = SESSION.post(
+            "https://api.github.com/graphql",
+            json={'query': REPO_QUERY, 'variables': {'owner': owner, 'name': repo}},
+            headers={"Authorization": f"bearer {token}"},
+            timeout=10
+        )
         
-        if repo_response.status_code != 200:
+        # A bad or expired token, or an exhausted GraphQL quota, shouldn't break analysis
+        if response.status_code in (401, 403):
+            return get_repo_data_rest(owner, repo)
+        if response.status_code != 200:
             return None, "Repository not found or is private"
         
-        repo_data = repo_response.json()
+        repository = (orjson.loads(response.content).get('data') or {}).get('repository')
+        # A token may see private repos, but results are cached for every visitor
+        if not repository or repository['isPrivate']:
+            return None, "Repository not found or is private"
         
-        # Repository contents
+        # Normalize to the REST field names used by the rest of the app
+        repo_data = {
+            'stargazers_count': repository['stargazerCount'],
+            'forks_count': repository['forkCount'],
+            'size': repository['diskUsage'],
+            'description': repository['description'],
+            'homepage': repository['homepageUrl'],
+            'language': (repository['primaryLanguage'] or {}).get('name')
+        }
+        entry_types = {'blob': 'file', 'tree': 'dir'}
+        contents_data = [
+            {'name': entry['name'], 'type': entry_types.get(entry['type'], entry['type'])}
+            for entry in (repository['object'] or {}).get('entries', [])
+        ]
+        
+        return {
+            'repo_data': repo_data,
+            'contents': contents_data,
+            'readme': (repository['readme'] or {}).get('text')
+        }, None
+        
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        return None, f"Error fetching repository data: {str(e)}"
+
+def get_repo_data_rest(owner, repo):
+    """Fetch repository data from the GitHub REST API"""
+    try:
+        repo_url = f"https://api.github.com/repos/{owner}/{repo}"
         contents_url = f"https://api.github.com/repos/{owner}/{repo}/contents"
-        contents_response = requests.get(contents_url, timeout=10)
-        contents_data = contents_response.json() if contents_response.status_code == 200 else []
+        
+        # Resolved here because the worker threads have no Streamlit script context
+        etag_cache = get_etag_cache()
+        
+        # Repository info and contents are independent, so fetch them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            repo_future = executor.submit(github_get, repo_url, etag_cache)
+            contents_future = executor.submit(github_get, contents_url, etag_cache)
+            repo_status, repo_content = repo_future.result()
+            contents_status, contents_content = contents_future.result()
+        
+        if repo_status != 200:
+            return None, "Repository not found or is private"
+        
+        repo_data = orjson.loads(repo_content)
+        contents_data = orjson.loads(contents_content) if contents_status == 200 else []
         
         return {
             'repo_data': repo_data,
             'contents': contents_data
         }, None
         
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         return None, f"Error fetching repository data: {str(e)}"
 
-def detect_technologies(contents, repo_data):
+# File-based detection: exact root filenames for each technology
+TECH_PATTERNS = {
+    'Python': frozenset(['requirements.txt', 'setup.py', 'pyproject.toml', 'pipfile', 'conda.yml', 'environment.yml']),
+    'Node.js': frozenset(['package.json', 'package-lock.json', 'yarn.lock']),
+    'React': frozenset(['package.json']),  # Will be refined later
+    'Django': frozenset(['manage.py']),
+    'Flask': frozenset(['app.py']),
+    'Streamlit': frozenset(['.streamlit']),
+    'Docker': frozenset(['dockerfile', 'docker-compose.yml', 'docker-compose.yaml']),
+    'Java': frozenset(['pom.xml', 'build.gradle', 'gradle.properties']),
+    'Go': frozenset(['go.mod', 'go.sum']),
+    'Rust': frozenset(['cargo.toml', 'cargo.lock']),
+    'Ruby': frozenset(['gemfile', 'gemfile.lock']),
+    'PHP': frozenset(['composer.json', 'composer.lock']),
+    'C++': frozenset(['makefile', 'cmakelists.txt']),
+    'HTML/CSS/JS': frozenset(['index.html', 'style.css', 'script.js']),
+    'Vue.js': frozenset(['vue.config.js', 'nuxt.config.js']),
+    'Angular': frozenset(['angular.json']),
+    'Next.js': frozenset(['next.config.js'])
+}
+
+def build_file_index(tech_patterns):
+    """Invert a tech -> filenames table into filename -> techs"""
+    index = defaultdict(list)
+    for tech, patterns in tech_patterns.items():
+        for pattern in patterns:
+            index[pattern].append(tech)
+    return dict(index)
+
+# Inverted index so detection is one dict lookup per file
+FILE_TO_TECHS = build_file_index(TECH_PATTERNS)
+
+# Keywords that may appear anywhere in a filename
+TECH_KEYWORDS = {
+    'django': 'Django',
+    'flask': 'Flask',
+    'fastapi': 'FastAPI',
+    'uvicorn': 'FastAPI',
+    'streamlit': 'Streamlit',
+    'cmake': 'C++',
+    'requirements': 'Python',  # requirements-dev.txt, dev-requirements.txt, ...
+    'docker': 'Docker',  # dockerfile.dev, dockerfile.prod, ...
+    'ng': 'Angular'
+}
+
+# Lookahead so overlapping keywords (e.g. "ng" inside "django") are all found in one sweep
+TECH_KEYWORD_RE = re.compile(
+    '(?=(' + '|'.join(sorted(map(re.escape, TECH_KEYWORDS), key=len, reverse=True)) + '))'
+)
+
+def detect_technologies(files, repo_data):
     """Detect technologies used in the repository"""
     tech_stack = set()
-    files = [item['name'].lower() for item in contents if item['type'] == 'file']
     
     # Language detection from GitHub API
     if repo_data.get('language'):
         tech_stack.add(repo_data['language'])
     
-    # File-based detection
-    tech_patterns = {
-        'Python': ['requirements.txt', 'setup.py', 'pyproject.toml', 'pipfile', 'conda.yml', 'environment.yml'],
-        'Node.js': ['package.json', 'package-lock.json', 'yarn.lock'],
-        'React': ['package.json'],  # Will be refined later
-        'Django': ['manage.py', 'django'],
-        'Flask': ['app.py', 'flask'],
-        'FastAPI': ['fastapi', 'uvicorn'],
-        'Streamlit': ['streamlit', '.streamlit'],
-        'Docker': ['dockerfile', 'docker-compose.yml', 'docker-compose.yaml'],
-        'Java': ['pom.xml', 'build.gradle', 'gradle.properties'],
-        'Go': ['go.mod', 'go.sum'],
-        'Rust': ['cargo.toml', 'cargo.lock'],
-        'Ruby': ['gemfile', 'gemfile.lock'],
-        'PHP': ['composer.json', 'composer.lock'],
-        'C++': ['makefile', 'cmake', 'cmakelists.txt'],
-        'HTML/CSS/JS': ['index.html', 'style.css', 'script.js'],
-        'Vue.js': ['vue.config.js', 'nuxt.config.js'],
-        'Angular': ['angular.json', 'ng'],
-        'Next.js': ['next.config.js']
-    }
+    for name in files:
+        tech_stack.update(FILE_TO_TECHS.get(name, ()))
     
-    for tech, patterns in tech_patterns.items():
-        if any(pattern in ' '.join(files) for pattern in patterns):
-            tech_stack.add(tech)
+    for match in TECH_KEYWORD_RE.finditer(' '.join(files)):
+        tech_stack.add(TECH_KEYWORDS[match.group(1)])
     
-    return list(tech_stack)
+    return sorted(tech_stack)
 
 def get_file_content(owner, repo, filename):
-    """Get content of a specific file from the repository"""
+    """Get the first few KB of a specific file from the repository"""
     try:
-        url = f"https://api.github.com/repos/{owner}/{repo}/contents/{filename}"
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            content = response.json()
-            if content.get('encoding') == 'base64':
-                return base64.b64decode(content['content']).decode('utf-8', errors='ignore')
+        return fetch_file_content(owner, repo, filename)
+    except requests.exceptions.RequestException:
         return None
-    except:
+
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_file_content(owner, repo, filename):
+    """Fetch and cache file content; None if missing, raising on other failures"""
+    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{filename}"
+    # Raw media type skips the base64 wrapper; Range caps the download size
+    status, content = github_get(url, get_etag_cache(), headers={
+        "Accept": "application/vnd.github.raw",
+        "Range": "bytes=0-4095"
+    }, max_bytes=4096)
+    if status == 404:
         return None
+    if status not in (200, 206):
+        raise requests.exceptions.HTTPError(f"{status} error fetching {filename}")
+    return content.decode('utf-8', errors='ignore')
 
-def generate_setup_steps(owner, repo, tech_stack, repo_data, contents):
+def generate_setup_steps(owner, repo, tech_stack, repo_data, files):
     """Generate step-by-step setup instructions"""
     steps = []
     
@@ -151,11 +367,11 @@ def generate_setup_steps(owner, repo, tech_stack, repo_data, contents):
     
     # Step 2: Technology-specific setup
     if 'Python' in tech_stack:
-        python_steps = generate_python_steps(owner, repo, contents)
+        python_steps = generate_python_steps(owner, repo, files)
         steps.extend(python_steps)
     
     if 'Node.js' in tech_stack:
-        node_steps = generate_node_steps(owner, repo, contents)
+        node_steps = generate_node_steps(owner, repo, files)
         steps.extend(node_steps)
     
     if 'Docker' in tech_stack:
@@ -163,19 +379,18 @@ def generate_setup_steps(owner, repo, tech_stack, repo_data, contents):
         steps.extend(docker_steps)
     
     if 'Java' in tech_stack:
-        java_steps = generate_java_steps(contents)
+        java_steps = generate_java_steps(files)
         steps.extend(java_steps)
     
     # Step 3: Running the application
-    run_steps = generate_run_steps(tech_stack, contents, owner, repo)
+    run_steps = generate_run_steps(tech_stack, files, owner, repo)
     steps.extend(run_steps)
     
     return steps
 
-def generate_python_steps(owner, repo, contents):
+def generate_python_steps(owner, repo, files):
     """Generate Python-specific setup steps"""
     steps = []
-    files = [item['name'].lower() for item in contents if item['type'] == 'file']
     
     # Virtual environment setup
     steps.append({
@@ -213,10 +428,9 @@ def generate_python_steps(owner, repo, contents):
     
     return steps
 
-def generate_node_steps(owner, repo, contents):
+def generate_node_steps(owner, repo, files):
     """Generate Node.js-specific setup steps"""
     steps = []
-    files = [item['name'].lower() for item in contents if item['type'] == 'file']
     
     # Check for package managers
     if 'yarn.lock' in files:
@@ -256,9 +470,8 @@ def generate_docker_steps():
         ]
     }]
 
-def generate_java_steps(contents):
+def generate_java_steps(files):
     """Generate Java-specific setup steps"""
-    files = [item['name'].lower() for item in contents if item['type'] == 'file']
     
     if 'pom.xml' in files:
         return [{
@@ -283,9 +496,8 @@ def generate_java_steps(contents):
     
     return []
 
-def generate_run_steps(tech_stack, contents, owner, repo):
+def generate_run_steps(tech_stack, files, owner, repo):
     """Generate application running steps"""
-    files = [item['name'].lower() for item in contents if item['type'] == 'file']
     steps = []
     
     # Try to detect main entry point
@@ -362,15 +574,83 @@ def generate_run_steps(tech_stack, contents, owner, repo):
     
     return steps
 
+def display_analysis(analysis):
+    """Render a repository analysis stored in session state"""
+    github_url = analysis['url']
+    owner, repo = analysis['owner'], analysis['repo']
+    data = analysis['data']
+    repo_data = data['repo_data']
+    tech_stack = analysis['tech']
+    steps = analysis['steps']
+    
+    # Display repository info
+    st.success(f"✅ Successfully analyzed **{owner}/{repo}**")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("⭐ Stars", repo_data.get('stargazers_count', 0))
+    with col2:
+        st.metric("🍴 Forks", repo_data.get('forks_count', 0))
+    with col3:
+        st.metric("📁 Size", f"{repo_data.get('size', 0)} KB")
+    
+    # Repository description
+    if repo_data.get('description'):
+        st.info(f"**Description:** {repo_data['description']}")
+    
+    if tech_stack:
+        st.subheader("🔧 Detected Technologies")
+        tech_html = "".join(f'<span class="tech-badge">{html.escape(tech)}</span>' for tech in tech_stack)
+        st.markdown(tech_html, unsafe_allow_html=True)
+    
+    # Setup steps
+    st.subheader("📋 Setup Instructions")
+    
+    for i, step in enumerate(steps, 1):
+        with st.expander(f"**Step {i}: {step['title']}**", expanded=True):
+            st.markdown(f"*{step['description']}*")
+            
+            if step['commands']:
+                st.markdown("**Commands to run:**")
+                command_text = '\n'.join(step['commands'])
+                st.code(command_text, language='bash')
+            
+            if step.get('notes'):
+                st.markdown("**📝 Notes:**")
+                for note in step['notes']:
+                    st.markdown(f"- {note}")
+    
+    # Additional resources
+    st.subheader("📚 Additional Resources")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        if st.button("📖 View README"):
+            readme_content = data['readme'] if 'readme' in data else get_file_content(owner, repo, 'README.md')
+            if readme_content:
+                st.markdown("### README.md")
+                st.markdown(readme_content[:2000] + ("..." if len(readme_content) > 2000 else ""))
+            else:
+                st.info("No README.md found")
+    
+    with col2:
+        st.markdown(f"**🔗 [View on GitHub]({github_url})**")
+    
+    with col3:
+        if repo_data.get('homepage'):
+            st.markdown(f"**🌐 [Live Demo]({repo_data['homepage']})**")
+
+HEADER_HTML = """
+<div class="main-header">
+    <h1>🚀 GitHub Repository Setup Guide</h1>
+    <p>Get step-by-step instructions to set up and run any GitHub repository</p>
+</div>
+"""
+
 # Main Streamlit App
 def main():
     # Header
-    st.markdown("""
-    <div class="main-header">
-        <h1>🚀 GitHub Repository Setup Guide</h1>
-        <p>Get step-by-step instructions to set up and run any GitHub repository</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(HEADER_HTML, unsafe_allow_html=True)
     
     # Sidebar
     with st.sidebar:
@@ -406,7 +686,11 @@ def main():
     with col2:
         analyze_button = st.button("🔍 Analyze Repository", type="primary", use_container_width=True)
     
-    if analyze_button and github_url:
+    # Reuse the stored analysis on other reruns; an explicit click goes through the fetch cache
+    analysis = st.session_state.get('analysis', {})
+    if not analyze_button and github_url and analysis.get('url') == github_url:
+        display_analysis(analysis)
+    elif analyze_button and github_url:
         # Validate URL
         if 'github.com' not in github_url:
             st.error("Please enter a valid GitHub repository URL")
@@ -428,68 +712,21 @@ def main():
                 return
             
             repo_data = data['repo_data']
-            contents = data['contents']
-        
-        # Display repository info
-        st.success(f"✅ Successfully analyzed **{owner}/{repo}**")
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("⭐ Stars", repo_data.get('stargazers_count', 0))
-        with col2:
-            st.metric("🍴 Forks", repo_data.get('forks_count', 0))
-        with col3:
-            st.metric("📁 Size", f"{repo_data.get('size', 0)} KB")
-        
-        # Repository description
-        if repo_data.get('description'):
-            st.info(f"**Description:** {repo_data['description']}")
-        
-        # Detect technologies
-        tech_stack = detect_technologies(contents, repo_data)
-        
-        if tech_stack:
-            st.subheader("🔧 Detected Technologies")
-            tech_html = "".join([f'<span class="tech-badge">{tech}</span>' for tech in tech_stack])
-            st.markdown(tech_html, unsafe_allow_html=True)
-        
-        # Generate setup steps
-        st.subheader("📋 Setup Instructions")
-        steps = generate_setup_steps(owner, repo, tech_stack, repo_data, contents)
-        
-        for i, step in enumerate(steps, 1):
-            with st.expander(f"**Step {i}: {step['title']}**", expanded=True):
-                st.markdown(f"*{step['description']}*")
-                
-                if step['commands']:
-                    st.markdown("**Commands to run:**")
-                    command_text = '\n'.join(step['commands'])
-                    st.code(command_text, language='bash')
-                
-                if step.get('notes'):
-                    st.markdown("**📝 Notes:**")
-                    for note in step['notes']:
-                        st.markdown(f"- {note}")
-        
-        # Additional resources
-        st.subheader("📚 Additional Resources")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.button("📖 View README"):
-                readme_content = get_file_content(owner, repo, 'README.md')
-                if readme_content:
-                    st.markdown("### README.md")
-                    st.markdown(readme_content[:2000] + ("..." if len(readme_content) > 2000 else ""))
-                else:
-                    st.info("No README.md found")
-        
-        with col2:
-            st.markdown(f"**🔗 [View on GitHub]({github_url})**")
+            # Lowercased root filenames, shared by detection and step generation
+            files = frozenset(item['name'].lower() for item in data['contents'] if item['type'] == 'file')
+            tech_stack = detect_technologies(files, repo_data)
+            steps = generate_setup_steps(owner, repo, tech_stack, repo_data, files)
         
-        with col3:
-            if repo_data.get('homepage'):
-                st.markdown(f"**🌐 [Live Demo]({repo_data['homepage']})**")
+        # Keep the result so reruns (e.g. clicking View README) don't refetch or blank the page
+        st.session_state['analysis'] = {
+            'url': github_url,
+            'owner': owner,
+            'repo': repo,
+            'data': data,
+            'tech': tech_stack,
+            'steps': steps
+        }
+        display_analysis(st.session_state['analysis'])
     
     elif analyze_button:
         st.warning("Please enter a GitHub repository URL first")